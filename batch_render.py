@@ -0,0 +1,214 @@
+"""
+batch_render.py
+
+Offline renderer that turns a recorded input log into overlay frames for post-production.
+Frames are rendered headlessly with ControllerProfile and spread across a process pool.
+
+The input log is JSON Lines, one joystick state per line, ordered by time:
+    {"t": 12.016, "buttons": [0, 1, 0], "axes": [0.0, -0.98], "hats": [[0, 1]]}
+"t" is in seconds. Each frame shows the latest state recorded at or before its timestamp.
+"""
+
+import sys
+
+sys.dont_write_bytecode = True  # Prevent writing __pycache__
+
+import argparse
+import json
+import os
+from argparse import Namespace
+from bisect import bisect_right
+from collections import deque
+from multiprocessing import Pool
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+# SDL traps SIGTERM otherwise, which keeps Pool.terminate() from stopping the workers
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+from calibration import load_calibration
+from cli_utils import positive_float, positive_int
+from controller_profile import ControllerProfile
+from joystick_utils import JoystickState
+from profile_store import list_profiles, load_profile
+
+# Per-process render state, filled in by init_worker
+_worker: dict = {}
+
+
+def get_args() -> Namespace:
+    """
+    Parse arguments for the batch renderer.
+    """
+    profile_names = list_profiles()
+    parser = argparse.ArgumentParser(description="Render a recorded input log to overlay frames")
+    parser.add_argument("input_log", type=Path, help="JSON Lines input log to render.")
+    parser.add_argument(
+        "--profile",
+        type=str,
+        required=True,
+        choices=profile_names,
+        help=f"Controller profile to use. Choices: {', '.join(profile_names)}",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="Directory for the PNG sequence, or a file ('-' for stdout) for the raw stream.",
+    )
+    parser.add_argument("--format", choices=["png", "raw"], default="png", help="PNG sequence or raw RGB24 stream.")
+    parser.add_argument("--fps", type=positive_float, default=60.0, help="Target frame rate.")
+    parser.add_argument("--start", type=float, default=None, help="Start time in seconds (default: first entry).")
+    parser.add_argument("--end", type=float, default=None, help="End time in seconds (default: last entry).")
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="Number of render processes.")
+    parser.add_argument("--chunk-size", type=positive_int, default=120, help="Frames rendered per task.")
+    parser.add_argument(
+        "--guid", type=str, default=None, help="Joystick GUID whose stick calibration to apply (default: from the log)."
+    )
+    return parser.parse_args()
+
+
+def load_input_log(path: Path) -> tuple[list[float], list[JoystickState]]:
+    """
+    Reads a recorded input log.
+    Args:
+        path (Path): Path to the JSON Lines log.
+    Returns:
+        tuple: Sorted timestamps and the joystick state recorded at each.
+    """
+    entries = []
+    with path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON: {e}") from e
+            if "t" not in data:
+                raise ValueError(f"{path}:{line_no}: entry has no 't' timestamp")
+            entries.append((float(data["t"]), JoystickState.from_dict(data)))
+    if not entries:
+        raise ValueError(f"Input log is empty: {path}")
+    entries.sort(key=lambda entry: entry[0])
+    return [t for t, _ in entries], [state for _, state in entries]
+
+
+def init_worker(
+    profile: dict, assets_dir: Path, calibration: dict, times: list[float], states: list[JoystickState]
+) -> None:
+    """
+    Process pool initializer. Sets up a headless display and loads the profile assets once per process.
+    """
+    pygame.display.init()
+    base_raw = pygame.image.load(str(assets_dir / profile["base"]))
+    size = base_raw.get_size()
+    # convert_alpha needs a display mode, even a dummy one
+    pygame.display.set_mode(size)
+    _worker["base_img"] = base_raw.convert_alpha()
+    _worker["profile"] = ControllerProfile(profile, assets_dir, calibration)
+    _worker["target"] = pygame.Surface(size)
+    _worker["times"] = times
+    _worker["states"] = states
+
+
+def state_at(t: float) -> JoystickState:
+    """
+    Returns the latest recorded state at or before t, or the first state if t precedes the log.
+    """
+    idx = bisect_right(_worker["times"], t) - 1
+    return _worker["states"][max(idx, 0)]
+
+
+def render_chunk(task: tuple[int, int, float, float, str, str]) -> bytes | int:
+    """
+    Renders frames [first, last) of the output.
+    Args:
+        task (tuple): first frame, last frame, start time, fps, output format, output path.
+    Returns:
+        bytes | int: Concatenated RGB24 frames for raw output, else the number of PNGs written.
+    """
+    first, last, start, fps, fmt, output = task
+    target = _worker["target"]
+    chunk = []
+    for frame in range(first, last):
+        _worker["profile"].render(target, _worker["base_img"], state_at(start + frame / fps))
+        if fmt == "raw":
+            chunk.append(pygame.image.tobytes(target, "RGB"))
+        else:
+            pygame.image.save(target, os.path.join(output, f"frame_{frame:06d}.png"))
+    return b"".join(chunk) if fmt == "raw" else last - first
+
+
+def main() -> None:
+    """
+    Main entry point for the batch renderer. Splits the frame range into chunks and renders them in parallel.
+    """
+    args = get_args()
+    assets_dir = Path("assets")
+    profile: dict = load_profile(args.profile, assets_dir)
+
+    base_path = assets_dir / profile["base"]
+    if not base_path.is_file():
+        raise FileNotFoundError(f"Base image not found: {base_path}")
+
+    times, states = load_input_log(args.input_log)
+    calibration = load_calibration(args.guid or states[0].get_guid())
+    start = times[0] if args.start is None else args.start
+    end = times[-1] if args.end is None else args.end
+    if end < start:
+        raise ValueError(f"End time {end} is before start time {start}")
+    total = int((end - start) * args.fps) + 1
+
+    tasks = [
+        (first, min(first + args.chunk_size, total), start, args.fps, args.format, args.output)
+        for first in range(0, total, args.chunk_size)
+    ]
+
+    if args.format == "png":
+        os.makedirs(args.output, exist_ok=True)
+        out = None
+    elif args.output == "-":
+        out = sys.stdout.buffer
+    else:
+        out = open(args.output, "wb")
+
+    w, h = pygame.image.load(str(base_path)).get_size()
+    print(f"Rendering {total} frames ({w}x{h} @ {args.fps:g} fps) with {args.workers} workers", file=sys.stderr)
+
+    initargs = (profile, assets_dir, calibration, times, states)
+    # Bounds how many rendered chunks can wait in memory while a slow consumer drains the raw stream
+    max_in_flight = 2 * args.workers
+    try:
+        with Pool(args.workers, initializer=init_worker, initargs=initargs) as pool:
+            pending = deque()
+            done = 0
+            for task in tasks:
+                pending.append(pool.apply_async(render_chunk, (task,)))
+                while len(pending) >= max_in_flight or (pending and task is tasks[-1]):
+                    # Results are taken in submission order, which the raw stream depends on
+                    result = pending.popleft().get()
+                    if out is not None:
+                        out.write(result)
+                    done += 1
+                    print(f"\r{done}/{len(tasks)} chunks", end="", file=sys.stderr)
+            pool.close()
+            pool.join()
+        print(file=sys.stderr)
+    finally:
+        if out is not None and out is not sys.stdout.buffer:
+            out.close()
+
+    if args.format == "raw":
+        print(
+            f"Raw stream: ffmpeg -f rawvideo -pix_fmt rgb24 -s {w}x{h} -r {args.fps:g} -i {args.output} ...",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
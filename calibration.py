@@ -0,0 +1,240 @@
+"""
+calibration.py
+
+Per-device stick calibration keyed by joystick GUID, and the precomputed lookup tables that map raw
+axis values to stick overlay positions. Run this module to capture a calibration for a profile's sticks.
+"""
+
+import sys
+
+sys.dont_write_bytecode = True  # Prevent writing __pycache__
+
+import argparse
+import json
+import math
+import statistics
+import time
+from argparse import Namespace
+from pathlib import Path
+
+import pygame
+
+from cli_utils import positive_float
+from joystick_utils import get_joystick
+from profile_store import list_profiles, load_profile
+
+CALIBRATION_FILE = Path("calibration.json")
+LUT_STEPS = 64  # Lookup table cells per unit of raw axis travel
+LUT_SIZE = 2 * LUT_STEPS + 1  # Raw axis values -1.0..1.0, with an exact cell for 0.0
+DEADZONE_MARGIN = 1.25  # Captured deadzones are widened by this factor
+
+
+def load_calibration(guid: str, path: Path = CALIBRATION_FILE) -> dict:
+    """
+    Loads the stick calibrations stored for a device.
+    Args:
+        guid (str): The joystick GUID.
+        path (Path): Calibration file.
+    Returns:
+        dict: Mapping of stick names to calibration values, empty if the device is not calibrated
+        or the file cannot be used.
+    """
+    if not guid or not path.is_file():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring calibration file {path}: {e}", file=sys.stderr)
+        return {}
+
+    device = data.get(guid, {}) if isinstance(data, dict) else None
+    sticks = device.get("sticks", {}) if isinstance(device, dict) else None
+    if not isinstance(sticks, dict):
+        print(f"Warning: ignoring malformed calibration for {guid} in {path}", file=sys.stderr)
+        return {}
+    for stick_name in [name for name, cal in sticks.items() if not isinstance(cal, dict)]:
+        print(f"Warning: ignoring malformed calibration for {stick_name} of {guid} in {path}", file=sys.stderr)
+        del sticks[stick_name]
+    return sticks
+
+
+def save_calibration(guid: str, name: str, sticks: dict, path: Path = CALIBRATION_FILE) -> None:
+    """
+    Stores the stick calibrations for a device, keeping other devices' entries.
+    Args:
+        guid (str): The joystick GUID.
+        name (str): The joystick name, for readability of the file.
+        sticks (dict): Mapping of stick names to calibration values.
+        path (Path): Calibration file.
+    """
+    data = {}
+    if path.is_file():
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    data.setdefault(guid, {"name": name, "sticks": {}})
+    data[guid]["name"] = name
+    data[guid]["sticks"].update(sticks)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def normalize(value: float, center: float, low: float, high: float) -> float:
+    """
+    Maps a raw axis value to -1.0..1.0 around its resting center, scaling each side by the range it reaches.
+    """
+    if value >= center:
+        n = (value - center) / (high - center) if high > center else 0.0
+    else:
+        n = (value - center) / (center - low) if center > low else 0.0
+    return max(-1.0, min(1.0, n))
+
+
+def lut_index(x: float, y: float) -> int:
+    """
+    Quantizes a pair of raw axis values to a lookup table index.
+    """
+    qx = min(max(round((x + 1) * LUT_STEPS), 0), LUT_SIZE - 1)
+    qy = min(max(round((y + 1) * LUT_STEPS), 0), LUT_SIZE - 1)
+    return qx * LUT_SIZE + qy
+
+
+def build_stick_lut(center: tuple[int, int], radius: float, cal: dict) -> list[tuple[int, int]]:
+    """
+    Precomputes stick overlay positions for every quantized pair of raw axis values.
+    Applies the calibrated center and range, a radial deadzone rescaled so movement starts from the
+    center, and clamps the stick to its radius.
+    Args:
+        center (tuple): Stick center in pixels.
+        radius (float): Stick travel in pixels.
+        cal (dict): 'center', 'min' and 'max' as [x, y] raw values and 'deadzone' as a normalized radius.
+    Returns:
+        list: Pixel positions, indexed by lut_index(x, y).
+    """
+    cx, cy = cal.get("center", (0.0, 0.0))
+    x_low, y_low = cal.get("min", (-1.0, -1.0))
+    x_high, y_high = cal.get("max", (1.0, 1.0))
+    deadzone = min(cal.get("deadzone", 0.0), 0.99)
+
+    raw = [q / LUT_STEPS - 1 for q in range(LUT_SIZE)]
+    norm_x = [normalize(v, cx, x_low, x_high) for v in raw]
+    norm_y = [normalize(v, cy, y_low, y_high) for v in raw]
+
+    lut = []
+    for nx in norm_x:
+        for ny in norm_y:
+            magnitude = math.hypot(nx, ny)
+            if magnitude <= deadzone:
+                lut.append((round(center[0]), round(center[1])))
+                continue
+            scale = (min(magnitude, 1.0) - deadzone) / (1.0 - deadzone) * radius / magnitude
+            lut.append((round(center[0] + nx * scale), round(center[1] + ny * scale)))
+    return lut
+
+
+def get_args() -> Namespace:
+    """
+    Parse arguments for the calibration capture.
+    """
+    profile_names = list_profiles()
+    parser = argparse.ArgumentParser(description="Capture stick calibration for a controller")
+    parser.add_argument(
+        "--profile",
+        type=str,
+        required=True,
+        choices=profile_names,
+        help=f"Controller profile to use. Choices: {', '.join(profile_names)}",
+    )
+    parser.add_argument("--rest", type=positive_float, default=3.0, help="Seconds of hands-off capture.")
+    parser.add_argument("--rotate", type=positive_float, default=6.0, help="Seconds of full stick rotations.")
+    parser.add_argument("--output", type=Path, default=CALIBRATION_FILE, help="Calibration file to update.")
+    return parser.parse_args()
+
+
+def sample_axes(joy: pygame.joystick.JoystickType, axes: list[int], seconds: float) -> dict[int, list[float]]:
+    """
+    Samples the given axes roughly every millisecond for the given time.
+    """
+    samples = {axis: [] for axis in axes}
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pygame.event.pump()
+        for axis in axes:
+            samples[axis].append(joy.get_axis(axis))
+        pygame.time.wait(1)
+    return samples
+
+
+def capture_calibration(joy: pygame.joystick.JoystickType, stick_cfgs: dict, rest: float, rotate: float) -> dict:
+    """
+    Measures each stick's resting center and noise, then the range it reaches while rotated.
+    Args:
+        joy: The pygame joystick object.
+        stick_cfgs (dict): Mapping of stick names to profile stick configs.
+        rest (float): Seconds of hands-off capture.
+        rotate (float): Seconds of full rotations.
+    Returns:
+        dict: Mapping of stick names to calibration values.
+    """
+    axes = sorted({axis for cfg in stick_cfgs.values() for axis in (cfg.get("x_axis", 0), cfg.get("y_axis", 1))})
+    print(f"Hands off the sticks for {rest:g} s...")
+    resting = sample_axes(joy, axes, rest)
+    print(f"Now rotate every stick around its full edge for {rotate:g} s...")
+    moving = sample_axes(joy, axes, rotate)
+
+    sticks = {}
+    for stick_name, cfg in stick_cfgs.items():
+        x_axis, y_axis = cfg.get("x_axis", 0), cfg.get("y_axis", 1)
+        center = [statistics.median(resting[x_axis]), statistics.median(resting[y_axis])]
+        low = [min(moving[x_axis] + resting[x_axis]), min(moving[y_axis] + resting[y_axis])]
+        high = [max(moving[x_axis] + resting[x_axis]), max(moving[y_axis] + resting[y_axis])]
+        for i, axis in enumerate((x_axis, y_axis)):
+            if high[i] - low[i] < 0.5:
+                print(f"Warning: {stick_name} axis {axis} barely moved, keeping the full -1.0..1.0 range")
+                low[i], high[i] = -1.0, 1.0
+
+        noise = max(
+            math.hypot(normalize(x, center[0], low[0], high[0]), normalize(y, center[1], low[1], high[1]))
+            for x, y in zip(resting[x_axis], resting[y_axis])
+        )
+        sticks[stick_name] = {
+            "center": center,
+            "min": low,
+            "max": high,
+            "deadzone": round(min(noise * DEADZONE_MARGIN, 0.5), 3),
+        }
+    return sticks
+
+
+def main() -> None:
+    """
+    Captures and saves the stick calibration for the profile's joystick.
+    """
+    args = get_args()
+    profile: dict = load_profile(args.profile)
+    pygame.init()
+    joy = get_joystick(profile)
+
+    if not joy:
+        raise RuntimeError(f"Joystick not found: {profile['controller_name']}")
+
+    stick_cfgs = {
+        name: cfg for name, cfg in profile.get("axes", {}).items() if name.endswith("_stick") and isinstance(cfg, dict)
+    }
+    if not stick_cfgs:
+        raise RuntimeError(f"Profile {args.profile} has no sticks to calibrate")
+
+    sticks = capture_calibration(joy, stick_cfgs, args.rest, args.rotate)
+    for stick_name, cal in sticks.items():
+        print(
+            f"{stick_name}: center ({cal['center'][0]:+.3f}, {cal['center'][1]:+.3f}), "
+            f"x [{cal['min'][0]:+.2f}, {cal['max'][0]:+.2f}], y [{cal['min'][1]:+.2f}, {cal['max'][1]:+.2f}], "
+            f"deadzone {cal['deadzone']:.3f}"
+        )
+    save_calibration(joy.get_guid(), joy.get_name(), sticks, args.output)
+    print(f"Saved calibration for {joy.get_name()} ({joy.get_guid()}) to {args.output}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
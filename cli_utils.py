@@ -0,0 +1,27 @@
+"""
+cli_utils.py
+
+Argument types shared by the command-line entry points.
+"""
+
+import argparse
+
+
+def positive_int(value: str) -> int:
+    """
+    argparse type for integers greater than zero.
+    """
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """
+    argparse type for numbers greater than zero.
+    """
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
@@ -16,9 +16,11 @@ from pathlib import Path
 
 import pygame
 
+from calibration import load_calibration
 from controller_profile import ControllerProfile
 from joystick_utils import get_joystick
-from profiles import PROFILES
+from profile_store import check_joystick, list_profiles, load_profile
+from state_bus import DEFAULT_BUS_NAME, StateBusReader
 
 os.environ["SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS"] = "1"
 
@@ -27,13 +29,22 @@ def get_args() -> Namespace:
     """
     Parse arguments/get profile.
     """
+    profile_names = list_profiles()
     parser = argparse.ArgumentParser(description="Controller Overlay")
     parser.add_argument(
         "--profile",
         type=str,
         required=True,
-        choices=list(PROFILES.keys()),
-        help=f"Controller profile to use. Choices: {', '.join(PROFILES.keys())}",
+        choices=profile_names,
+        help=f"Controller profile to use. Choices: {', '.join(profile_names)}",
+    )
+    parser.add_argument(
+        "--bus",
+        type=str,
+        nargs="?",
+        const=DEFAULT_BUS_NAME,
+        default=None,
+        help="Read controller state from a running state_bus.py instead of opening the joystick.",
     )
     return parser.parse_args()
 
@@ -43,14 +54,21 @@ def main() -> None:
     Main entry point for the controller overlay application. Parses arguments, loads profile, and initializes pygame.
     """
     args = get_args()
-    profile: dict = PROFILES[args.profile]
     assets_dir = Path("assets")
+    profile: dict = load_profile(args.profile, assets_dir)
     pygame.init()
-    joy = get_joystick(profile)
+    bus = StateBusReader(args.bus) if args.bus else None
+    joy = bus.read() if bus else get_joystick(profile)
 
     if not joy:
         raise RuntimeError(f"Joystick not found: {profile['controller_name']}")
 
+    errors, warnings = check_joystick(profile, joy)
+    for warning in warnings:
+        print(f"Warning: profile {args.profile}: {warning}", file=sys.stderr)
+    if errors:
+        raise ValueError(f"Profile {args.profile} does not match the joystick:\n  " + "\n  ".join(errors))
+
     base_path = assets_dir / profile["base"]
     if not base_path.is_file():
         raise FileNotFoundError(f"Base image not found: {base_path}")
@@ -62,7 +80,7 @@ def main() -> None:
     base_img = base_raw.convert_alpha()
 
     # Use the new ControllerProfile abstraction
-    controller_profile = ControllerProfile(profile, assets_dir)
+    controller_profile = ControllerProfile(profile, assets_dir, load_calibration(joy.get_guid()))
 
     clock = pygame.time.Clock()
     running = True
@@ -74,21 +92,15 @@ def main() -> None:
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 running = False
 
-        overlays = controller_profile.get_active_overlays(joy)
-
-        screen.fill((0, 0, 0))
-        screen.blit(base_img, (0, 0))
-        for surface in overlays:
-            screen.blit(surface, (0, 0))
-
-        # Draw all stick overlays (l_stick, r_stick, etc.)
-        for stick_name in controller_profile.stick_cfgs:
-            surface, rect = controller_profile.get_stick_rect(joy, stick_name)
-            if surface and rect:
-                screen.blit(surface, rect.topleft)
-
+        if bus:
+            if not bus.alive():
+                raise RuntimeError(f"State bus '{args.bus}' stopped publishing. Is state_bus.py still running?")
+            joy = bus.read()
+        controller_profile.render(screen, base_img, joy)
         pygame.display.flip()
         clock.tick(60)
+    if bus:
+        bus.close()
     pygame.quit()
 
 
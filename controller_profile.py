@@ -11,6 +11,7 @@ from pygame import Surface
 from pygame.joystick import JoystickType
 from pygame.rect import Rect
 
+from calibration import build_stick_lut, lut_index
 from overlay_assets import (
     load_axis_cbutton_overlays,
     load_axis_dpad_overlays,
@@ -34,11 +35,14 @@ class ControllerProfile:
     Loads overlays and provides methods to retrieve active overlays and stick positions
     based on the current joystick state. Enables data-driven, extensible controller support.
     Supports multiple analog sticks (e.g., l_stick, r_stick, etc.).
+    Sticks with a per-device calibration are positioned through precomputed lookup tables; the rest keep
+    the linear mapping with a per-axis deadzone.
     """
 
-    def __init__(self, profile: dict, assets_dir: Path):
+    def __init__(self, profile: dict, assets_dir: Path, calibration: dict | None = None):
         self.profile = profile
         self.assets_dir = assets_dir
+        calibration = calibration or {}
 
         # buttons
         self.button_surfaces = load_button_overlays(
@@ -71,6 +75,7 @@ class ControllerProfile:
         # Support multiple sticks (l_stick, r_stick, etc.)
         self.stick_cfgs = {}
         self.stick_surfaces = {}
+        self.stick_luts = {}
         axes: Dict[str, Any] = profile.get("axes", {})
         for stick_name, cfg in axes.items():
             if stick_name.endswith("_stick") and isinstance(cfg, dict):
@@ -78,6 +83,9 @@ class ControllerProfile:
                 self.stick_surfaces[stick_name] = load_axis_stick_overlay(
                     assets_dir=assets_dir, stick_overlay_file=cfg.get("overlay", "")
                 )
+                if stick_name in calibration:
+                    cal = {"deadzone": cfg.get("deadzone", 0), **calibration[stick_name]}
+                    self.stick_luts[stick_name] = build_stick_lut(cfg.get("center"), cfg.get("radius"), cal)
 
     def get_active_overlays(self, joy: JoystickType):
         """
@@ -107,10 +115,11 @@ class ControllerProfile:
         surface: Surface = self.stick_surfaces.get(stick_name)
         if not (cfg and surface):
             return None, None
-        x_axis = cfg.get("x_axis", 0)
-        y_axis = cfg.get("y_axis", 1)
-        x = joy.get_axis(x_axis)
-        y = joy.get_axis(y_axis)
+        x = joy.get_axis(cfg.get("x_axis", 0))
+        y = joy.get_axis(cfg.get("y_axis", 1))
+        lut = self.stick_luts.get(stick_name)
+        if lut:
+            return surface, surface.get_rect(center=lut[lut_index(x, y)])
         deadzone = cfg.get("deadzone", 0)
         if abs(x) < deadzone:
             x = 0
@@ -121,3 +130,18 @@ class ControllerProfile:
         stick_px = int(center[0] + x * radius)
         stick_py = int(center[1] + y * radius)
         return surface, surface.get_rect(center=(stick_px, stick_py))
+
+    def render(self, target: Surface, base_img: Surface, joy: JoystickType) -> None:
+        """
+        Compose the base image, active overlays and sticks onto the target surface
+        """
+        target.fill((0, 0, 0))
+        target.blit(base_img, (0, 0))
+        for surface in self.get_active_overlays(joy):
+            target.blit(surface, (0, 0))
+
+        # Draw all stick overlays (l_stick, r_stick, etc.)
+        for stick_name in self.stick_cfgs:
+            surface, rect = self.get_stick_rect(joy, stick_name)
+            if surface and rect:
+                target.blit(surface, rect.topleft)
@@ -1,49 +1,345 @@
-import pygame
+"""
+inspect_controller.py
 
-pygame.init()
-pygame.joystick.init()
+Prints joystick input as it changes, or, with --analyze, measures the device: effective report rate,
+inter-report jitter, per-axis noise floor with suggested deadzones, and stuck or chattering buttons.
+The analyzer can also print a draft profile skeleton in the profiles/*.json format.
+"""
 
-if pygame.joystick.get_count() == 0:
-    print("No joystick detected!")
-    quit()
+import argparse
+import json
+import math
+import statistics
+import time
+from argparse import Namespace
 
-joystick = pygame.joystick.Joystick(0)
-joystick.init()
+import pygame
 
-print(f"Joystick Name: {joystick.get_name()}")
-print(f"Buttons: {joystick.get_numbuttons()}")
-print(f"Axes: {joystick.get_numaxes()}")
-print(f"Hats: {joystick.get_numhats()}")
-print("Press buttons, move sticks, or press the D-Pad (Ctrl+C to quit):\n")
+from profile_store import to_json
 
-# We store last seen values to only print changes
-last_axes = [0.0] * joystick.get_numaxes()
-last_buttons = [0] * joystick.get_numbuttons()
-last_hats = [(0, 0)] * joystick.get_numhats()
 THRESH = 0.05  # Only print axes changes above this threshold
+REPORT_GAP = 0.0002  # Events received closer together than this (s) belong to the same report
+CHATTER_TIME = 0.010  # Presses or releases shorter than this (s) count as chatter
+TRIGGER_REST = 0.9  # Axes resting beyond this magnitude are treated as triggers
+
+
+def get_args() -> Namespace:
+    """
+    Parse arguments.
+    """
+    parser = argparse.ArgumentParser(description="Inspect or analyze a controller")
+    parser.add_argument("--joystick", type=int, default=0, help="Joystick index to open.")
+    parser.add_argument("--threshold", type=float, default=THRESH, help="Only print axis changes above this.")
+    parser.add_argument("--interval", type=int, default=20, help="Polling interval in ms when watching.")
+    parser.add_argument(
+        "--analyze",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="Measure the device for this many seconds of active input instead of watching.",
+    )
+    parser.add_argument(
+        "--rest", type=float, default=3.0, help="Seconds of hands-off capture before the active phase."
+    )
+    parser.add_argument(
+        "--skeleton", type=str, metavar="PROFILE_NAME", default=None, help="Print a draft profile after analyzing."
+    )
+    return parser.parse_args()
+
+
+def open_joystick(index: int) -> pygame.joystick.JoystickType:
+    """
+    Initializes and returns the joystick at the given index.
+    """
+    pygame.joystick.init()
+    count = pygame.joystick.get_count()
+    if count == 0:
+        raise RuntimeError("No joystick detected!")
+    if not 0 <= index < count:
+        raise RuntimeError(f"Joystick index {index} out of range, {count} detected")
+    joystick = pygame.joystick.Joystick(index)
+    joystick.init()
+    return joystick
+
+
+def watch(joystick: pygame.joystick.JoystickType, threshold: float, interval: int) -> None:
+    """
+    Prints button, axis and hat changes until interrupted.
+    """
+    print("Press buttons, move sticks, or press the D-Pad (Ctrl+C to quit):\n")
+
+    # We store last seen values to only print changes
+    last_axes = [0.0] * joystick.get_numaxes()
+    last_buttons = [0] * joystick.get_numbuttons()
+    last_hats = [(0, 0)] * joystick.get_numhats()
+
+    while True:
+        pygame.event.pump()
+        # Axes
+        for i in range(joystick.get_numaxes()):
+            val = joystick.get_axis(i)
+            if abs(val - last_axes[i]) > threshold:
+                print(f"Axis {i}: {val:.2f}")
+                last_axes[i] = val
+
+        # Buttons
+        for i in range(joystick.get_numbuttons()):
+            val = joystick.get_button(i)
+            if val != last_buttons[i]:
+                state = "pressed" if val else "released"
+                print(f"Button {i}: {state}")
+                last_buttons[i] = val
+
+        # Hats (D-pad)
+        for i in range(joystick.get_numhats()):
+            val = joystick.get_hat(i)
+            if val != last_hats[i]:
+                print(f"Hat {i}: {val}")
+                last_hats[i] = val
+
+        pygame.time.wait(interval)
+
+
+def capture(joystick: pygame.joystick.JoystickType, seconds: float) -> dict:
+    """
+    Busy-polls the event queue for the given time and timestamps every joystick event on receipt.
+    Args:
+        joystick: The pygame joystick object.
+        seconds (float): Capture duration.
+    Returns:
+        dict: 'reports' (receipt times of grouped events), 'motion' (whether each report moved an axis),
+        'axes' (per-axis samples), 'buttons' (per-button (time, pressed) transitions),
+        'held' (buttons down at the start).
+    """
+    instance_id = joystick.get_instance_id()
+    num_axes = joystick.get_numaxes()
+    data = {
+        "reports": [],
+        "motion": [],
+        "axes": [[joystick.get_axis(i)] for i in range(num_axes)],
+        "buttons": {},
+        "held": {i for i in range(joystick.get_numbuttons()) if joystick.get_button(i)},
+    }
+    joy_events = (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION)
+    last_event = -math.inf
+    end = time.perf_counter() + seconds
+    while (now := time.perf_counter()) < end:
+        for event in pygame.event.get():
+            if event.type not in joy_events or event.instance_id != instance_id:
+                continue
+            if now - last_event > REPORT_GAP:
+                data["reports"].append(now)
+                data["motion"].append(False)
+            last_event = now
+            if event.type == pygame.JOYAXISMOTION:
+                data["motion"][-1] = True
+                data["axes"][event.axis].append(event.value)
+            elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                data["buttons"].setdefault(event.button, []).append((now, event.type == pygame.JOYBUTTONDOWN))
+    return data
+
+
+def suggest_deadzone(offset: float, noise: float) -> float:
+    """
+    Rounds the resting offset plus noise, with 25% margin, up to the next 0.05.
+    """
+    return max(0.05, math.ceil((offset + noise) * 1.25 / 0.05) * 0.05)
+
+
+def analyze_report_rate(reports: list[float], motion: list[bool]) -> dict | None:
+    """
+    Effective report rate and jitter from report receipt times. SDL only emits events on change,
+    so only intervals between two consecutive axis-motion reports are measured; every other interval
+    may include time where nothing changed and is counted as an idle gap instead. Late reports while
+    a stick is moving stay in the measurement, so they show up in the stdev, p99 and max.
+    Args:
+        reports (list): Report receipt times.
+        motion (list): Whether each report contained axis motion.
+    Returns:
+        dict | None: Rate and jitter figures, or None if too few intervals were measured.
+    """
+    active = []
+    idle = []
+    for a, b, moving in zip(reports, reports[1:], (m0 and m1 for m0, m1 in zip(motion, motion[1:]))):
+        (active if moving else idle).append(b - a)
+    if len(active) < 10:
+        return None
+    active.sort()
+    median = statistics.median(active)
+    return {
+        "rate_hz": 1 / median,
+        "median_ms": median * 1000,
+        "stdev_ms": statistics.pstdev(active) * 1000,
+        "p99_ms": active[math.ceil(len(active) * 0.99) - 1] * 1000,
+        "max_ms": active[-1] * 1000,
+        "intervals": len(active),
+        "idle_gaps": len(idle),
+        "longest_idle_ms": max(idle, default=0.0) * 1000,
+    }
+
+
+def analyze_axes(rest_axes: list[list[float]], active_axes: list[list[float]]) -> list[dict]:
+    """
+    Per-axis resting offset, noise floor, suggested deadzone and the range reached while active.
+    """
+    results = []
+    for i, samples in enumerate(rest_axes):
+        center = statistics.median(samples)
+        noise = max(abs(v - center) for v in samples)
+        reached = samples + active_axes[i]
+        trigger = abs(center) > TRIGGER_REST
+        results.append(
+            {
+                "axis": i,
+                "center": center,
+                "noise": noise,
+                "trigger": trigger,
+                "deadzone": None if trigger else suggest_deadzone(abs(center), noise),
+                "min": min(reached),
+                "max": max(reached),
+            }
+        )
+    return results
+
+
+def analyze_buttons(rest: dict, active: dict) -> dict[int, list[str]]:
+    """
+    Flags buttons held throughout, pressed while hands-off, or bouncing faster than CHATTER_TIME.
+    Returns:
+        dict: Button index to a list of issues.
+    """
+    issues = {}
+    transitions: dict[int, list] = {}
+    for phase in (rest, active):
+        for button, events in phase["buttons"].items():
+            transitions.setdefault(button, []).extend(events)
+
+    for button in rest["held"]:
+        if not any(not pressed for _, pressed in transitions.get(button, [])):
+            issues.setdefault(button, []).append("held for the whole capture (stuck?)")
+    for button in rest["buttons"]:
+        issues.setdefault(button, []).append("changed state while hands-off")
+    for button, events in transitions.items():
+        bounces = sum(1 for (t0, _), (t1, _) in zip(events, events[1:]) if t1 - t0 < CHATTER_TIME)
+        if bounces:
+            issues.setdefault(button, []).append(
+                f"{bounces} transition(s) under {CHATTER_TIME * 1000:.0f} ms (chattering)"
+            )
+    return issues
+
+
+def build_skeleton(name: str, joystick: pygame.joystick.JoystickType, axes: list[dict], pressed: set[int]) -> dict:
+    """
+    Drafts a runtime profile. Asset paths, stick centers and radii are placeholders.
+    """
+    folder = name.lower()
+    buttons = sorted(pressed) or list(range(joystick.get_numbuttons()))
+    profile = {
+        "base": f"{folder}/base.png",
+        "button_overlays": {i: f"{folder}/button_{i}.png" for i in buttons},
+        "console": name,
+        "controller_name": joystick.get_name(),
+    }
+
+    stick_axes = [a for a in axes if not a["trigger"]]
+    trigger_axes = [a for a in axes if a["trigger"]]
+    profile_axes = {}
+    for stick_name, (x, y) in zip(("l_stick", "r_stick", "c_stick"), zip(stick_axes[::2], stick_axes[1::2])):
+        profile_axes[stick_name] = {
+            "x_axis": x["axis"],
+            "y_axis": y["axis"],
+            "overlay": f"{folder}/stick.png",
+            "center": (0, 0),
+            "radius": 20,
+            "deadzone": max(x["deadzone"], y["deadzone"]),
+        }
+    if len(trigger_axes) >= 2:
+        profile_axes["triggers"] = {
+            "x_axis": trigger_axes[0]["axis"],
+            "y_axis": trigger_axes[1]["axis"],
+            "threshold": 0.85,
+            "overlays": {"l2": f"{folder}/l2.png", "r2": f"{folder}/r2.png"},
+        }
+    if profile_axes:
+        profile["axes"] = profile_axes
+
+    if joystick.get_numhats():
+        profile["hat_overlays"] = {
+            (0, 1): f"{folder}/up.png",
+            (0, -1): f"{folder}/down.png",
+            (-1, 0): f"{folder}/left.png",
+            (1, 0): f"{folder}/right.png",
+        }
+    return profile
+
+
+def analyze(joystick: pygame.joystick.JoystickType, seconds: float, rest_seconds: float, skeleton: str | None) -> None:
+    """
+    Runs the hands-off and active capture phases and prints the measurements.
+    """
+    print(f"Hands off the controller for {rest_seconds:g} s...")
+    rest = capture(joystick, rest_seconds)
+    print(f"Now for {seconds:g} s: rotate every stick, pull every trigger and press every button.")
+    active = capture(joystick, seconds)
+    print()
+
+    rate = analyze_report_rate(active["reports"], active["motion"])
+    if rate:
+        print(
+            f"Report rate: {rate['rate_hz']:.0f} Hz "
+            f"({rate['median_ms']:.2f} ms median over {rate['intervals']} intervals of axis motion)"
+        )
+        print(f"Jitter: {rate['stdev_ms']:.2f} ms stdev, {rate['p99_ms']:.2f} ms p99, {rate['max_ms']:.2f} ms max")
+        print(
+            f"Excluded {rate['idle_gaps']} interval(s) not between two axis-motion reports "
+            f"(longest {rate['longest_idle_ms']:.1f} ms)"
+        )
+    else:
+        print("Report rate: not enough reports, keep the sticks moving during the active phase")
+
+    print("\nAxes:")
+    axes = analyze_axes(rest["axes"], active["axes"])
+    for a in axes:
+        suggestion = "trigger, no deadzone" if a["trigger"] else f"suggested deadzone {a['deadzone']:.2f}"
+        print(
+            f"  Axis {a['axis']}: rest {a['center']:+.3f}, noise {a['noise']:.3f}, "
+            f"range [{a['min']:+.2f}, {a['max']:+.2f}] -> {suggestion}"
+        )
+
+    print("\nButtons:")
+    issues = analyze_buttons(rest, active)
+    pressed = {b for b, events in active["buttons"].items() if any(p for _, p in events)}
+    print(f"  Pressed: {sorted(pressed) if pressed else 'none'}")
+    for button, problems in sorted(issues.items()):
+        print(f"  Button {button}: {'; '.join(problems)}")
+
+    if skeleton:
+        print(f"\nDraft profile, save as profiles/{skeleton}.json:")
+        print(json.dumps(to_json(build_skeleton(skeleton, joystick, axes, pressed)), indent=2))
+
+
+def main() -> None:
+    """
+    Opens the joystick and either watches or analyzes it.
+    """
+    args = get_args()
+    pygame.init()
+    joystick = open_joystick(args.joystick)
+
+    print(f"Joystick Name: {joystick.get_name()}")
+    print(f"Buttons: {joystick.get_numbuttons()}")
+    print(f"Axes: {joystick.get_numaxes()}")
+    print(f"Hats: {joystick.get_numhats()}")
+
+    try:
+        if args.analyze:
+            analyze(joystick, args.analyze, args.rest, args.skeleton)
+        else:
+            watch(joystick, args.threshold, args.interval)
+    except KeyboardInterrupt:
+        pass
+    pygame.quit()
+
 
-while True:
-    pygame.event.pump()
-    # Axes
-    for i in range(joystick.get_numaxes()):
-        val = joystick.get_axis(i)
-        if abs(val - last_axes[i]) > THRESH:
-            print(f"Axis {i}: {val:.2f}")
-            last_axes[i] = val
-
-    # Buttons
-    for i in range(joystick.get_numbuttons()):
-        val = joystick.get_button(i)
-        if val != last_buttons[i]:
-            state = "pressed" if val else "released"
-            print(f"Button {i}: {state}")
-            last_buttons[i] = val
-
-    # Hats (D-pad)
-    for i in range(joystick.get_numhats()):
-        val = joystick.get_hat(i)
-        if val != last_hats[i]:
-            print(f"Hat {i}: {val}")
-            last_hats[i] = val
-
-    pygame.time.wait(20)
+if __name__ == "__main__":
+    main()
@@ -39,3 +39,74 @@ def get_joystick(profile: dict) -> Optional[pygame.joystick.JoystickType]:
     joy.init()
     print(f"Using joystick: {joy.get_name()}")
     return joy
+
+
+class JoystickState:
+    """
+    A snapshot of joystick buttons, axes and hats that quacks like a pygame joystick.
+    Lets the overlay logic run against recorded or shared input instead of a live device.
+    """
+
+    def __init__(self, buttons: list[int], axes: list[float], hats: list[tuple[int, int]], guid: str = ""):
+        self.buttons = buttons
+        self.axes = axes
+        self.hats = hats
+        self.guid = guid
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JoystickState":
+        """
+        Builds a state from a recorded input entry.
+        Args:
+            data (dict): Entry with optional 'buttons', 'axes' and 'hats' lists and 'guid'.
+        Returns:
+            JoystickState: The snapshot.
+        """
+        return cls(
+            buttons=[int(b) for b in data.get("buttons", [])],
+            axes=[float(a) for a in data.get("axes", [])],
+            hats=[(int(h[0]), int(h[1])) for h in data.get("hats", [])],
+            guid=data.get("guid", ""),
+        )
+
+    def get_guid(self) -> str:
+        """
+        Returns the GUID of the device the state came from, or an empty string.
+        """
+        return self.guid
+
+    def get_numbuttons(self) -> int:
+        """
+        Returns the number of buttons in the snapshot.
+        """
+        return len(self.buttons)
+
+    def get_button(self, i: int) -> int:
+        """
+        Returns the state of button i, 0 if the snapshot has no such button.
+        """
+        return self.buttons[i] if i < len(self.buttons) else 0
+
+    def get_numaxes(self) -> int:
+        """
+        Returns the number of axes in the snapshot.
+        """
+        return len(self.axes)
+
+    def get_axis(self, i: int) -> float:
+        """
+        Returns the value of axis i, 0.0 if the snapshot has no such axis.
+        """
+        return self.axes[i] if i < len(self.axes) else 0.0
+
+    def get_numhats(self) -> int:
+        """
+        Returns the number of hats in the snapshot.
+        """
+        return len(self.hats)
+
+    def get_hat(self, i: int) -> tuple[int, int]:
+        """
+        Returns the position of hat i, (0, 0) if the snapshot has no such hat.
+        """
+        return self.hats[i] if i < len(self.hats) else (0, 0)
@@ -0,0 +1,343 @@
+"""
+profile_store.py
+
+Loads controller profiles from JSON files in the profiles directory. Each file holds either one profile,
+named after the file, or an object mapping several profile names to profiles.
+
+A cached index (profiles/.index.json) records which file holds each profile and its schema errors,
+or why the file could not be read. Entries are keyed by file size and modification time, so listing
+profiles only stats the files, and loading one only parses the file that holds it.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+PROFILES_DIR = Path("profiles")
+INDEX_NAME = ".index.json"
+INDEX_VERSION = 2
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+# Indexes already built by this process, keyed by resolved profiles directory
+_index_cache: dict[Path, dict] = {}
+
+
+def from_json(data: dict) -> dict:
+    """
+    Converts a profile from its JSON form to the form ControllerProfile uses:
+    integer button indices, (x, y) tuple hat positions and tuple stick centers.
+    Args:
+        data (dict): Profile as stored in JSON.
+    Returns:
+        dict: The runtime profile.
+    """
+    profile = dict(data)
+    profile["button_overlays"] = {int(i): f for i, f in data.get("button_overlays", {}).items()}
+    profile["hat_overlays"] = {
+        tuple(int(v) for v in hat.split(",")): f for hat, f in data.get("hat_overlays", {}).items()
+    }
+    axes = {}
+    for name, cfg in data.get("axes", {}).items():
+        if name.endswith("_stick") and "center" in cfg:
+            cfg = {**cfg, "center": tuple(cfg["center"])}
+        axes[name] = cfg
+    if axes:
+        profile["axes"] = axes
+    return profile
+
+
+def to_json(profile: dict) -> dict:
+    """
+    Converts a runtime profile back to its JSON form.
+    """
+    data = dict(profile)
+    data["button_overlays"] = {str(i): f for i, f in sorted(profile.get("button_overlays", {}).items())}
+    if "hat_overlays" in profile:
+        data["hat_overlays"] = {f"{hat[0]},{hat[1]}": f for hat, f in profile["hat_overlays"].items()}
+    if "axes" in profile:
+        data["axes"] = {
+            name: {**cfg, "center": list(cfg["center"])} if "center" in cfg else cfg
+            for name, cfg in profile["axes"].items()
+        }
+    return data
+
+
+def _is_index(value) -> bool:
+    """
+    True for a non-negative integer index (booleans excluded).
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_number(value) -> bool:
+    """
+    True for an int or float (booleans excluded).
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_overlays(errors: list[str], where: str, overlays, keys: tuple[str, ...] | None = None) -> None:
+    """
+    Appends errors for an overlay mapping that is not an object of file names, or has unexpected keys.
+    """
+    if not isinstance(overlays, dict):
+        errors.append(f"{where}: must be an object of overlay files")
+        return
+    for key, fname in overlays.items():
+        if keys and key not in keys:
+            errors.append(f"{where}: unknown key '{key}', expected one of {', '.join(keys)}")
+        if not isinstance(fname, str):
+            errors.append(f"{where}.{key}: overlay must be a file name")
+
+
+def _check_axis_pair(errors: list[str], where: str, cfg: dict) -> None:
+    """
+    Appends errors for x_axis/y_axis values that are not axis indices.
+    """
+    for key in ("x_axis", "y_axis"):
+        if key in cfg and not _is_index(cfg[key]):
+            errors.append(f"{where}.{key}: must be a non-negative integer axis index")
+
+
+def validate_profile(data: dict) -> list[str]:
+    """
+    Checks a profile in its JSON form against the profile schema.
+    Args:
+        data (dict): Profile as stored in JSON.
+    Returns:
+        list: Error messages, empty if the profile is valid.
+    """
+    if not isinstance(data, dict):
+        return ["profile must be an object"]
+    errors = []
+    for key in ("base", "controller_name"):
+        if not isinstance(data.get(key), str):
+            errors.append(f"{key}: required string")
+    if "console" in data and not isinstance(data["console"], str):
+        errors.append("console: must be a string")
+
+    _check_overlays(errors, "button_overlays", data.get("button_overlays", {}))
+    for key in data.get("button_overlays", {}) if isinstance(data.get("button_overlays"), dict) else []:
+        if not key.isdigit():
+            errors.append(f"button_overlays.{key}: key must be a button index")
+
+    _check_overlays(errors, "hat_overlays", data.get("hat_overlays", {}))
+    for key in data.get("hat_overlays", {}) if isinstance(data.get("hat_overlays"), dict) else []:
+        parts = key.split(",")
+        if len(parts) != 2 or any(p.strip() not in ("-1", "0", "1") for p in parts):
+            errors.append(f"hat_overlays.{key}: key must be 'x,y' with values -1, 0 or 1")
+
+    axes = data.get("axes", {})
+    if not isinstance(axes, dict):
+        return errors + ["axes: must be an object"]
+    for name, cfg in axes.items():
+        where = f"axes.{name}"
+        if not isinstance(cfg, dict):
+            errors.append(f"{where}: must be an object")
+        elif name.endswith("_stick"):
+            _check_axis_pair(errors, where, cfg)
+            if not isinstance(cfg.get("overlay"), str):
+                errors.append(f"{where}.overlay: required file name")
+            center = cfg.get("center")
+            if not (isinstance(center, list) and len(center) == 2 and all(_is_number(v) for v in center)):
+                errors.append(f"{where}.center: required [x, y] pixel position")
+            if not (_is_number(cfg.get("radius")) and cfg["radius"] > 0):
+                errors.append(f"{where}.radius: required positive number")
+            if "deadzone" in cfg and not (_is_number(cfg["deadzone"]) and 0 <= cfg["deadzone"] < 1):
+                errors.append(f"{where}.deadzone: must be between 0 and 1")
+        elif name in ("dpad", "triggers"):
+            _check_axis_pair(errors, where, cfg)
+            if "threshold" in cfg and not _is_number(cfg["threshold"]):
+                errors.append(f"{where}.threshold: must be a number")
+            keys = DIRECTIONS if name == "dpad" else ("l2", "r2")
+            _check_overlays(errors, f"{where}.overlays", cfg.get("overlays", {}), keys)
+        elif name == "c_buttons":
+            if "threshold" in cfg and not _is_number(cfg["threshold"]):
+                errors.append(f"{where}.threshold: must be a number")
+            for direction in DIRECTIONS:
+                mapping = cfg.get(direction)
+                if mapping is None:
+                    continue
+                if not isinstance(mapping, dict):
+                    errors.append(f"{where}.{direction}: must be an object")
+                    continue
+                if not _is_index(mapping.get("axis")):
+                    errors.append(f"{where}.{direction}.axis: required non-negative integer axis index")
+                if mapping.get("direction") not in (-1, 1):
+                    errors.append(f"{where}.{direction}.direction: must be -1 or 1")
+                if not isinstance(mapping.get("overlay"), str):
+                    errors.append(f"{where}.{direction}.overlay: required file name")
+        else:
+            errors.append(f"{where}: unknown axis mapping, expected dpad, triggers, c_buttons or *_stick")
+    return errors
+
+
+def _asset_files(profile: dict) -> list[str]:
+    """
+    All asset file names referenced by a runtime profile.
+    """
+    files = [profile["base"], *profile.get("button_overlays", {}).values(), *profile.get("hat_overlays", {}).values()]
+    for name, cfg in profile.get("axes", {}).items():
+        if name.endswith("_stick"):
+            files.append(cfg["overlay"])
+        elif name == "c_buttons":
+            files += [cfg[d]["overlay"] for d in DIRECTIONS if d in cfg]
+        else:
+            files += cfg.get("overlays", {}).values()
+    return files
+
+
+def check_assets(profile: dict, assets_dir: Path) -> list[str]:
+    """
+    Reports asset files referenced by a runtime profile that do not exist.
+    """
+    files = dict.fromkeys(_asset_files(profile))
+    return [f"missing asset: {assets_dir / f}" for f in files if not (assets_dir / f).is_file()]
+
+
+def check_joystick(profile: dict, joy) -> tuple[list[str], list[str]]:
+    """
+    Reports button, axis and hat indices in a runtime profile that the joystick does not have.
+    Missing axes are errors, since stick and trigger mappings would read the wrong input. Missing buttons
+    and hats are only warnings: their overlays are never shown, but the rest of the profile still works.
+    Args:
+        profile (dict): The runtime profile.
+        joy: A pygame joystick or anything with the same get_num* methods.
+    Returns:
+        tuple: Error messages and warning messages, both empty if every index exists.
+    """
+    errors = []
+    warnings = []
+    num_axes = joy.get_numaxes()
+    for button in profile.get("button_overlays", {}):
+        if button >= joy.get_numbuttons():
+            warnings.append(f"button_overlays.{button}: joystick has {joy.get_numbuttons()} buttons")
+    if profile.get("hat_overlays") and joy.get_numhats() == 0:
+        warnings.append("hat_overlays: joystick has no hats")
+    for name, cfg in profile.get("axes", {}).items():
+        if name == "c_buttons":
+            indices = {f"{d}.axis": cfg[d]["axis"] for d in DIRECTIONS if d in cfg}
+        else:
+            indices = {key: cfg.get(key, default) for key, default in (("x_axis", 0), ("y_axis", 1))}
+        for key, axis in indices.items():
+            if axis >= num_axes:
+                errors.append(f"axes.{name}.{key}: axis {axis} out of range, joystick has {num_axes} axes")
+    return errors, warnings
+
+
+def _read_file(path: Path) -> dict:
+    """
+    Parses a profile file into a mapping of profile names to JSON profiles.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "base" in data:
+        return {path.stem: data}
+    if isinstance(data, dict) and all(isinstance(v, dict) for v in data.values()):
+        return data
+    raise ValueError(f"{path}: expected a profile or an object of profiles")
+
+
+def load_index(profiles_dir: Path = PROFILES_DIR) -> dict:
+    """
+    Returns the profile index, re-reading and re-validating only files that changed since it was cached.
+    The index is built once per process, so the directory is scanned and warnings are printed only once.
+    Returns:
+        dict: Mapping of profile names to {'file': file name, 'errors': schema errors}.
+    """
+    key = profiles_dir.resolve()
+    if key not in _index_cache:
+        _index_cache[key] = _build_index(profiles_dir)
+    return _index_cache[key]
+
+
+def _build_index(profiles_dir: Path) -> dict:
+    """
+    Scans the profiles directory against the cached index file and rewrites the file if anything changed.
+    """
+    index_path = profiles_dir / INDEX_NAME
+    cached = {}
+    if index_path.is_file():
+        try:
+            with index_path.open("r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                cached = index.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    files = {}
+    dirty = False
+    with os.scandir(profiles_dir) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.name.endswith(".json") or entry.name == INDEX_NAME or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entry_cache = cached.get(entry.name)
+            if entry_cache and entry_cache["mtime_ns"] == stat.st_mtime_ns and entry_cache["size"] == stat.st_size:
+                files[entry.name] = entry_cache
+                continue
+            dirty = True
+            profiles, error = {}, None
+            try:
+                profiles = {name: validate_profile(data) for name, data in _read_file(Path(entry.path)).items()}
+            except (OSError, ValueError) as e:
+                error = str(e)
+            files[entry.name] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "profiles": profiles,
+                "error": error,
+            }
+
+    if dirty or files.keys() != cached.keys():
+        try:
+            with index_path.open("w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "files": files}, f)
+        except OSError:
+            pass
+
+    # Warnings go to stderr: stdout may be a raw video stream (batch_render --output -)
+    index = {}
+    for fname, entry in files.items():
+        if entry["error"]:
+            print(f"Warning: skipping profile file {profiles_dir / fname}: {entry['error']}", file=sys.stderr)
+        for name, errors in entry["profiles"].items():
+            if name in index:
+                print(f"Warning: profile {name} in {fname} shadowed by {index[name]['file']}", file=sys.stderr)
+                continue
+            index[name] = {"file": fname, "errors": errors}
+    return index
+
+
+def list_profiles(profiles_dir: Path = PROFILES_DIR) -> list[str]:
+    """
+    Returns the names of all available profiles from the cached index.
+    """
+    return list(load_index(profiles_dir))
+
+
+def load_profile(name: str, assets_dir: Path | None = None, profiles_dir: Path = PROFILES_DIR) -> dict:
+    """
+    Parses and validates a single profile, including that its assets exist when assets_dir is given.
+    Args:
+        name (str): Profile name.
+        assets_dir (Path | None): Directory containing assets.
+        profiles_dir (Path): Directory containing profile files.
+    Returns:
+        dict: The runtime profile.
+    """
+    entry = load_index(profiles_dir).get(name)
+    if not entry:
+        raise ValueError(f"Unknown profile: {name}")
+    errors = entry["errors"]
+    if errors:
+        raise ValueError(f"Invalid profile {name} ({entry['file']}):\n  " + "\n  ".join(errors))
+
+    profile = from_json(_read_file(profiles_dir / entry["file"])[name])
+    errors = check_assets(profile, assets_dir) if assets_dir else []
+    if errors:
+        raise ValueError(f"Invalid profile {name} ({entry['file']}):\n  " + "\n  ".join(errors))
+    return profile
@@ -0,0 +1,526 @@
+"""
+state_bus.py
+
+Shared-memory controller state bus. One capture process opens the joystick and publishes its raw
+buttons, axes and hats; any number of local processes attach as read-only consumers.
+
+The header and payload are guarded by a seqlock: the writer bumps the sequence counter to an odd value,
+writes, then bumps it back to even. Readers copy and retry if the counter was odd or moved underneath
+them, so neither side ever blocks. Python cannot emit memory barriers, so the seqlock alone is only
+sound where stores and loads stay in order (x86). On weakly ordered CPUs such as ARM a reader could
+pass the sequence check with a torn copy, so the writer also stores a CRC32 of the guarded bytes and
+readers discard copies that do not match.
+
+The header carries the writer's pid and a heartbeat so consumers can tell when the capture process is
+gone. Consumers can ask for a wake-up on change: they send a registration datagram to the writer's
+control port, and the writer, the only process that edits the notify table, assigns them a slot and
+drops slots whose owning process has exited.
+"""
+
+import sys
+
+sys.dont_write_bytecode = True  # Prevent writing __pycache__
+
+import argparse
+import os
+import socket
+import struct
+import time
+import zlib
+from argparse import Namespace
+from multiprocessing import shared_memory
+from typing import Optional
+
+import pygame
+
+from cli_utils import positive_int
+from joystick_utils import JoystickState, get_joystick
+from profile_store import list_profiles, load_profile
+
+os.environ["SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS"] = "1"
+
+DEFAULT_BUS_NAME = "controller_spy"
+MAGIC = b"CSPY"
+VERSION = 3
+MAX_BUTTONS = 32
+MAX_AXES = 16
+MAX_HATS = 4
+NOTIFY_SLOTS = 8
+STALE_AFTER = 1.0  # Seconds without a heartbeat before the writer counts as gone
+READ_TIMEOUT = 0.002  # Seconds read() retries a torn or in-progress copy before keeping the last state
+REGISTER_TIMEOUT = 0.5  # Seconds a consumer waits for the writer to assign a notify slot
+PRUNE_INTERVAL = 1.0  # Seconds between checks for notify slots owned by exited processes
+
+# magic, version, num buttons, num axes, num hats, controller name, joystick GUID, writer pid, control port
+HEADER = struct.Struct("<4sHHHH64s32sIH")
+# sequence counter, CRC32 of header and payload
+SEQ = struct.Struct("<QI")
+# writer heartbeat in ms on the system-wide monotonic clock
+HEARTBEAT = struct.Struct("<Q")
+# owner pid, UDP port
+SLOT = struct.Struct("<IHxx")
+PAYLOAD = struct.Struct(f"<{MAX_BUTTONS}B{MAX_AXES}f{MAX_HATS * 2}b")
+
+SEQ_OFFSET = (HEADER.size + 7) // 8 * 8
+HEARTBEAT_OFFSET = SEQ_OFFSET + 16
+NOTIFY_OFFSET = HEARTBEAT_OFFSET + HEARTBEAT.size
+PAYLOAD_OFFSET = NOTIFY_OFFSET + NOTIFY_SLOTS * SLOT.size
+BLOCK_SIZE = PAYLOAD_OFFSET + PAYLOAD.size
+
+# Control datagrams: opcode byte followed by the sender's pid
+REGISTER = b"R"
+UNREGISTER = b"U"
+ASSIGNED = b"A"
+FULL = b"F"
+WAKE = b"\x01"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing block without letting the resource tracker unlink it when this process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument, so unregister by hand
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")  # pylint: disable=protected-access
+        return shm
+
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Returns True if a process with the given pid is running.
+    """
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # ERROR_ACCESS_DENIED: exists but not ours
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _now_ms() -> int:
+    """
+    Milliseconds on the monotonic clock, which is shared by all processes on the machine.
+    """
+    return time.monotonic_ns() // 1_000_000
+
+
+class StateBusWriter:
+    """
+    Owns the shared-memory block and publishes joystick state into it.
+    Only one writer may exist per bus name; a second one refuses to start while the first is alive.
+    """
+
+    def __init__(
+        self,
+        controller_name: str,
+        num_buttons: int,
+        num_axes: int,
+        num_hats: int,
+        guid: str = "",
+        name=DEFAULT_BUS_NAME,
+    ):
+        self.seq = 0
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=BLOCK_SIZE)
+            self.shm.buf[:BLOCK_SIZE] = bytes(BLOCK_SIZE)
+        except FileExistsError:
+            self.shm = self._take_over(name)
+        self.buf = self.shm.buf
+        self.num_buttons = min(num_buttons, MAX_BUTTONS)
+        self.num_axes = min(num_axes, MAX_AXES)
+        self.num_hats = min(num_hats, MAX_HATS)
+        self.last = None
+        self.next_prune = 0.0
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.setblocking(False)
+
+        self.header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.num_buttons,
+            self.num_axes,
+            self.num_hats,
+            controller_name.encode("utf-8")[:64],
+            guid.encode("ascii")[:32],
+            os.getpid(),
+            self.sock.getsockname()[1],
+        )
+        self.heartbeat()
+        self.publish([], [], [])
+
+    def _take_over(self, name: str) -> shared_memory.SharedMemory:
+        """
+        Attaches to an existing block left behind by a writer that did not shut down cleanly.
+        Continues from its sequence counter and keeps its notify slots so attached consumers carry on.
+        """
+        shm = _attach(name)
+        if shm.size < BLOCK_SIZE:
+            shm.close()
+            shm.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=BLOCK_SIZE)
+            shm.buf[:BLOCK_SIZE] = bytes(BLOCK_SIZE)
+            return shm
+
+        header = HEADER.unpack_from(shm.buf, 0)
+        if header[0] != MAGIC or header[1] != VERSION:
+            # Older layout: nothing in it can be trusted, but attached readers will reject the new version
+            shm.buf[:BLOCK_SIZE] = bytes(BLOCK_SIZE)
+            return shm
+        pid = header[7]
+        if pid != os.getpid() and _pid_alive(pid):
+            shm.close()
+            raise RuntimeError(f"State bus '{name}' is already published by process {pid}")
+        # Skip past the old counter, even if it was left odd mid-write
+        self.seq = (SEQ.unpack_from(shm.buf, SEQ_OFFSET)[0] | 1) + 1
+        return shm
+
+    def _slots(self) -> list[tuple[int, int]]:
+        """
+        Returns the (owner pid, port) of every notify slot.
+        """
+        return [SLOT.unpack_from(self.buf, NOTIFY_OFFSET + i * SLOT.size) for i in range(NOTIFY_SLOTS)]
+
+    def publish(self, buttons: list[int], axes: list[float], hats: list[tuple[int, int]]) -> bool:
+        """
+        Writes a new state if it differs from the last one and wakes registered consumers.
+        Args:
+            buttons (list): Button states.
+            axes (list): Axis values.
+            hats (list): Hat positions.
+        Returns:
+            bool: True if the state changed and was published.
+        """
+        values = (
+            list(buttons[: self.num_buttons])
+            + [0] * (MAX_BUTTONS - len(buttons[: self.num_buttons]))
+            + list(axes[: self.num_axes])
+            + [0.0] * (MAX_AXES - len(axes[: self.num_axes]))
+            + [v for hat in hats[: self.num_hats] for v in hat]
+            + [0] * (2 * (MAX_HATS - len(hats[: self.num_hats])))
+        )
+        if values == self.last:
+            return False
+        self.last = values
+        payload = PAYLOAD.pack(*values)
+
+        # The header is rewritten every time so a taken-over block is fully covered by one even sequence
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq + 1, 0)
+        self.buf[: HEADER.size] = self.header
+        self.buf[PAYLOAD_OFFSET : PAYLOAD_OFFSET + PAYLOAD.size] = payload
+        self.seq += 2
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq, zlib.crc32(self.header + payload))
+
+        for pid, port in self._slots():
+            if pid:
+                try:
+                    self.sock.sendto(WAKE, ("127.0.0.1", port))
+                except OSError:
+                    pass
+        return True
+
+    def publish_joystick(self, joy) -> bool:
+        """
+        Publishes the current state of a pygame joystick.
+        """
+        return self.publish(
+            buttons=[joy.get_button(i) for i in range(self.num_buttons)],
+            axes=[joy.get_axis(i) for i in range(self.num_axes)],
+            hats=[joy.get_hat(i) for i in range(self.num_hats)],
+        )
+
+    def heartbeat(self) -> None:
+        """
+        Marks the writer as alive for consumers.
+        """
+        HEARTBEAT.pack_into(self.buf, HEARTBEAT_OFFSET, _now_ms())
+
+    def service(self) -> None:
+        """
+        Called once per poll: updates the heartbeat, answers notify registrations and frees slots of
+        consumers that exited without unregistering.
+        """
+        self.heartbeat()
+        while True:
+            try:
+                message, (_, port) = self.sock.recvfrom(16)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            if len(message) != 5:
+                continue
+            pid = struct.unpack_from("<I", message, 1)[0]
+            if message[:1] == REGISTER:
+                self._assign(pid, port)
+            elif message[:1] == UNREGISTER:
+                for slot, owner in enumerate(self._slots()):
+                    if owner == (pid, port):
+                        SLOT.pack_into(self.buf, NOTIFY_OFFSET + slot * SLOT.size, 0, 0)
+
+        if time.monotonic() >= self.next_prune:
+            self.next_prune = time.monotonic() + PRUNE_INTERVAL
+            for slot, (pid, _) in enumerate(self._slots()):
+                if pid and not _pid_alive(pid):
+                    SLOT.pack_into(self.buf, NOTIFY_OFFSET + slot * SLOT.size, 0, 0)
+
+    def _assign(self, pid: int, port: int) -> None:
+        """
+        Gives a consumer a notify slot and tells it which one, or that the table is full.
+        """
+        slots = self._slots()
+        if (pid, port) in slots:
+            slot = slots.index((pid, port))
+        elif (0, 0) in slots:
+            slot = slots.index((0, 0))
+            SLOT.pack_into(self.buf, NOTIFY_OFFSET + slot * SLOT.size, pid, port)
+        else:
+            slot = None
+        reply = FULL if slot is None else ASSIGNED + bytes([slot])
+        try:
+            self.sock.sendto(reply, ("127.0.0.1", port))
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """
+        Releases and removes the shared-memory block.
+        """
+        self.sock.close()
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class StateBusReader:
+    """
+    Read-only consumer of a state bus. read() returns a JoystickState, so it can stand in for a
+    pygame joystick anywhere the overlay logic expects one.
+    """
+
+    def __init__(self, name=DEFAULT_BUS_NAME, notify: bool = False):
+        try:
+            self.shm = _attach(name)
+        except FileNotFoundError as e:
+            raise RuntimeError(f"State bus '{name}' not found. Is state_bus.py running?") from e
+        self.buf = self.shm.buf
+        self.name = name
+        self.sock = None
+        self.slot = None
+        magic, version = HEADER.unpack_from(self.buf, 0)[:2]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise RuntimeError(f"State bus '{name}' has an unknown layout")
+
+        self.seq = -1
+        self.state = JoystickState([], [], [])
+        self.controller_name = ""
+        self.guid = ""
+        self.read()
+        if notify:
+            self._register()
+
+    def _register(self) -> None:
+        """
+        Asks the writer for a notify slot. Falls back to polling if the writer does not answer or
+        every slot is taken.
+        """
+        port = HEADER.unpack_from(self.buf, 0)[8]
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(REGISTER_TIMEOUT)
+        try:
+            self.sock.sendto(REGISTER + struct.pack("<I", os.getpid()), ("127.0.0.1", port))
+            deadline = time.monotonic() + REGISTER_TIMEOUT
+            while time.monotonic() < deadline:
+                reply = self.sock.recv(16)
+                if reply[:1] == ASSIGNED and len(reply) == 2:
+                    self.slot = reply[1]
+                    return
+                if reply[:1] == FULL:
+                    break
+        except OSError:
+            pass
+        print("Warning: no notify slot on the state bus, falling back to polling", file=sys.stderr)
+        self.sock.close()
+        self.sock = None
+
+    def read(self) -> JoystickState:
+        """
+        Returns a consistent snapshot of the latest published state. If no consistent copy can be made
+        within READ_TIMEOUT, for example because the writer died mid-write, the last good state is returned.
+        """
+        deadline = time.perf_counter() + READ_TIMEOUT
+        while True:
+            seq = SEQ.unpack_from(self.buf, SEQ_OFFSET)[0]
+            if seq == self.seq:
+                return self.state
+            if not seq & 1:
+                header = bytes(self.buf[: HEADER.size])
+                payload = bytes(self.buf[PAYLOAD_OFFSET : PAYLOAD_OFFSET + PAYLOAD.size])
+                check_seq, crc = SEQ.unpack_from(self.buf, SEQ_OFFSET)
+                if check_seq == seq and zlib.crc32(header + payload) == crc:
+                    break
+            if time.perf_counter() >= deadline:
+                return self.state
+            time.sleep(0)
+
+        _, _, num_buttons, num_axes, num_hats, raw_name, raw_guid, _, _ = HEADER.unpack(header)
+        values = PAYLOAD.unpack(payload)
+        axes_start = MAX_BUTTONS
+        hats_start = MAX_BUTTONS + MAX_AXES
+        self.seq = seq
+        self.controller_name = raw_name.rstrip(b"\x00").decode("utf-8", errors="replace")
+        self.guid = raw_guid.rstrip(b"\x00").decode("ascii", errors="replace")
+        self.state = JoystickState(
+            buttons=list(values[:num_buttons]),
+            axes=list(values[axes_start : axes_start + num_axes]),
+            hats=[(values[hats_start + 2 * i], values[hats_start + 2 * i + 1]) for i in range(num_hats)],
+            guid=self.guid,
+        )
+        return self.state
+
+    def changed(self) -> bool:
+        """
+        True if a newer state was published since the last read().
+        """
+        return SEQ.unpack_from(self.buf, SEQ_OFFSET)[0] != self.seq
+
+    def alive(self) -> bool:
+        """
+        True while the capture process is running and its heartbeat is recent.
+        """
+        pid = HEADER.unpack_from(self.buf, 0)[7]
+        beat = HEARTBEAT.unpack_from(self.buf, HEARTBEAT_OFFSET)[0]
+        return _now_ms() - beat < STALE_AFTER * 1000 and _pid_alive(pid)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the state changes, the timeout (seconds) expires or the writer goes away.
+        Uses the wake-up socket when registered, else polls the sequence counter.
+        Returns:
+            bool: True if the state changed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.changed():
+            if not self.alive():
+                return False
+            remaining = STALE_AFTER if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.sock is None:
+                time.sleep(0.001)
+                continue
+            # Bounded so a writer that exits is noticed even without a wake-up
+            self.sock.settimeout(min(remaining, STALE_AFTER))
+            try:
+                self.sock.recv(16)
+            except socket.timeout:
+                continue
+            except OSError:
+                pass
+            # Drain any wake-ups that piled up while the consumer was busy
+            self.sock.setblocking(False)
+            try:
+                while True:
+                    self.sock.recv(16)
+            except OSError:
+                pass
+        return True
+
+    def close(self) -> None:
+        """
+        Gives back the notify slot and detaches from the block.
+        """
+        if self.sock:
+            port = HEADER.unpack_from(self.buf, 0)[8]
+            try:
+                self.sock.sendto(UNREGISTER + struct.pack("<I", os.getpid()), ("127.0.0.1", port))
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+            self.slot = None
+        self.buf = None
+        self.shm.close()
+
+
+def get_args() -> Namespace:
+    """
+    Parse arguments for the capture process.
+    """
+    profile_names = list_profiles()
+    parser = argparse.ArgumentParser(description="Controller state bus capture process")
+    parser.add_argument(
+        "--profile",
+        type=str,
+        required=True,
+        choices=profile_names,
+        help=f"Controller profile to use. Choices: {', '.join(profile_names)}",
+    )
+    parser.add_argument("--name", type=str, default=DEFAULT_BUS_NAME, help="Shared-memory block name.")
+    parser.add_argument("--rate", type=positive_int, default=1000, help="Polling rate in Hz.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Capture process: opens the joystick once and publishes its state to the bus until interrupted.
+    """
+    args = get_args()
+    profile: dict = load_profile(args.profile)
+    pygame.init()
+    joy = get_joystick(profile)
+
+    if not joy:
+        raise RuntimeError(f"Joystick not found: {profile['controller_name']}")
+
+    writer = StateBusWriter(
+        controller_name=joy.get_name(),
+        num_buttons=joy.get_numbuttons(),
+        num_axes=joy.get_numaxes(),
+        num_hats=joy.get_numhats(),
+        guid=joy.get_guid(),
+        name=args.name,
+    )
+    print(f"Publishing '{joy.get_name()}' on state bus '{args.name}' at {args.rate} Hz (Ctrl+C to quit)")
+
+    clock = pygame.time.Clock()
+    try:
+        while True:
+            pygame.event.pump()
+            writer.publish_joystick(joy)
+            writer.service()
+            clock.tick(args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()